@@ -0,0 +1,23 @@
+"""
+Contents of the text fixtures, read once when this module is imported.
+"""
+
+import os
+
+from diff_cover.tests.helpers import fixture_path
+
+
+def _read_fixtures():
+    """
+    Return a dict mapping the name of each text fixture
+    to its contents.
+    """
+    fixtures = {}
+    for name in os.listdir(fixture_path("")):
+        if name.endswith((".txt", ".html", ".xml")):
+            with open(fixture_path(name), encoding="utf-8") as fixture_file:
+                fixtures[name] = fixture_file.read()
+    return fixtures
+
+
+EXPECTED = _read_fixtures()
@@ -2,27 +2,110 @@
 High-level integration tests of diff-cover tool.
 """
 
+import contextlib
+import functools
+import glob
+import hashlib
 import io
 import os
 import os.path
+import pickle
 import re
 import shutil
+import sys
 import tempfile
 import unittest
 from collections import defaultdict
 from io import BytesIO
 from subprocess import Popen
 
-import pylint
+import pytest
+
+import diff_cover
 from diff_cover.command_runner import CommandError
 from diff_cover.diff_cover_tool import main as diff_cover_main
 from diff_cover.diff_quality_tool import QUALITY_DRIVERS
 from diff_cover.diff_quality_tool import main as diff_quality_main
 from diff_cover.git_path import GitPathTool
+from diff_cover.tests.fixture_constants import EXPECTED
 from diff_cover.tests.helpers import assert_long_str_equal, fixture_path
 from diff_cover.violationsreporters.base import QualityDriver
 from unittest.mock import Mock, patch
 
+_CSS_RE = re.compile(r"<style>.*?</style>", re.DOTALL)
+_SNIPPETS_START = '<div class="snippets">'
+_DIV_RE = re.compile(r"<(/?)div\b")
+_ANCHOR_RE = re.compile(r'<a [^>]*\bname="([^"]*)"[^>]*></a>')
+_HLL_SPAN = '<span class="hll">'
+_TAG_RE = re.compile(r"<[^>]+>")
+_GIT_DIFF_PREFIX = (
+    "git",
+    "-c",
+    "diff.mnemonicprefix=no",
+    "-c",
+    "diff.noprefix=no",
+    "diff",
+)
+_LINTERS = ("pycodestyle", "pyflakes", "pylint")
+
+# Set DIFFCOVER_TEST_CACHE to a directory to cache diff-cover console
+# reports between local runs.  The tests run from the fixtures dir, so
+# resolve the path now.
+_TOOL_CACHE_DIR = os.environ.get("DIFFCOVER_TEST_CACHE")
+if _TOOL_CACHE_DIR:
+    _TOOL_CACHE_DIR = os.path.abspath(_TOOL_CACHE_DIR)
+
+
+@functools.lru_cache(maxsize=None)
+def _source_digest():
+    """
+    Return a digest of the diff-cover sources and templates, so cached
+    reports are thrown away as soon as the code under test changes.
+    """
+    package_dir = os.path.dirname(diff_cover.__file__)
+    digest = hashlib.sha256()
+    for pattern in ("*.py", "violationsreporters/*.py", "templates/*"):
+        for path in sorted(glob.glob(os.path.join(package_dir, pattern))):
+            with open(path, "rb") as source_file:
+                digest.update(source_file.read())
+    return digest.digest()
+
+
+def _report_test(check, git_diff_path, expected_path, tool_args, expected_status):
+    """
+    Return a test method that calls the report check named `check`
+    with the given arguments.
+    """
+
+    def test(self):
+        getattr(self, check)(git_diff_path, expected_path, tool_args, expected_status)
+
+    return test
+
+
+def _add_report_tests(cls):
+    """
+    Add a `test_<name>` method to the test class `cls` for each
+    `(name, git_diff_path, expected_path, tool_args, expected_status)`
+    row of its `HTML_CASES`, `CONSOLE_CASES` and `PRE_GENERATED_CASES`
+    tables, so every case is a test of its own that can be selected
+    with `-k`.
+    """
+    tables = (
+        ("_check_html_report", cls.HTML_CASES),
+        ("_check_console_report", cls.CONSOLE_CASES),
+        ("_check_console_report", cls.PRE_GENERATED_CASES),
+    )
+    for check, cases in tables:
+        for name, *case in cases:
+            test_name = f"test_{name}"
+            assert not hasattr(cls, test_name), f"duplicate test {test_name}"
+            test = _report_test(check, *case)
+            test.__name__ = test_name
+            test.__qualname__ = f"{cls.__qualname__}.{test_name}"
+            setattr(cls, test_name, test)
+    return cls
+
 
 class ToolsIntegrationBase(unittest.TestCase):
     """
@@ -30,32 +113,91 @@ class ToolsIntegrationBase(unittest.TestCase):
     """
 
     _old_cwd = None
+    _patchers = ()
 
-    def setUp(self):
+    # Case tables turned into test methods by `_add_report_tests`
+    HTML_CASES = ()
+    CONSOLE_CASES = ()
+    PRE_GENERATED_CASES = ()
+
+    # Whether pylint runs in-process; see `_run_pylint`
+    _run_pylint_in_process = False
+
+    @classmethod
+    def setUpClass(cls):
         """
-        Patch the output of `git` commands and `os.getcwd`
+        Patch the output of `git` commands, the git root and `os.getcwd`
         set the cwd to the fixtures dir
+
+        The patched targets are the same for every test in the class,
+        so start the patches once here and only reset them in `setUp`.
         """
-        # Set the CWD to the fixtures dir
-        self._old_cwd = os.getcwd()
-        os.chdir(fixture_path(""))
-        cwd = os.getcwd()
+        super().setUpClass()
+
+        # The fixtures dir stands in for the git root and the tools' cwd
+        cls._git_root_path = os.path.realpath(fixture_path(""))
+
+        # Create a temporary directory to hold the output HTML reports
+        cls._temp_dir = tempfile.mkdtemp()
 
-        self._mock_popen = patch("subprocess.Popen").start()
-        self._mock_sys = patch(f"{self.tool_module}.sys").start()
+        # Output of the linter commands run so far, keyed on the command
+        cls._linter_output = {}
+
+        # The tools open the coverage reports and source files they are
+        # given relative to the real cwd, and pylint looks for its rcfile
+        # there, so the process still has to run from the fixtures dir.
+        # The tests themselves only use absolute paths.
+        cls._old_cwd = os.getcwd()
+        os.chdir(cls._git_root_path)
+
+        # unittest skips tearDownClass when setUpClass fails, so undo
+        # the chdir and any started patches here if a patch fails
+        patchers = (
+            patch("subprocess.Popen"),
+            patch(f"{cls.tool_module}.os.getcwd"),
+            patch.object(GitPathTool, "_git_root"),
+        )
+        started = []
         try:
-            self._mock_getcwd = patch(f"{self.tool_module}.os.getcwdu").start()
-        except AttributeError:
-            self._mock_getcwd = patch(f"{self.tool_module}.os.getcwd").start()
-        self._git_root_path = cwd
+            for patcher in patchers:
+                started.append(patcher.start())
+        except BaseException:
+            for patcher in reversed(patchers[: len(started)]):
+                patcher.stop()
+            os.chdir(cls._old_cwd)
+            shutil.rmtree(cls._temp_dir, ignore_errors=True)
+            raise
+        cls._mock_popen, cls._mock_getcwd, cls._mock_git_root = started
+        cls._patchers = patchers
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        Undo all patches and reset the cwd
+        """
+        for patcher in reversed(cls._patchers):
+            patcher.stop()
+        cls._patchers = ()
+        os.chdir(cls._old_cwd)
+        shutil.rmtree(cls._temp_dir, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        """
+        Reset the state of the class-wide mocks
+        """
+        self._mock_popen.reset_mock()
+        self._mock_popen.side_effect = None
+        self._mock_getcwd.reset_mock()
         self._mock_getcwd.return_value = self._git_root_path
+        self._mock_git_root.return_value = self._git_root_path
 
     def tearDown(self):
         """
-        Undo all patches and reset the cwd
+        Empty the shared temporary directory for the next test
         """
-        patch.stopall()
-        os.chdir(self._old_cwd)
+        for name in os.listdir(self._temp_dir):
+            os.unlink(os.path.join(self._temp_dir, name))
 
     def _clear_css(self, content):
         """
@@ -64,9 +206,35 @@ class ToolsIntegrationBase(unittest.TestCase):
 
         Perhaps I will eat these words
         """
-        clean_content = re.sub("r'<style>.*</style>", content, "", re.DOTALL)
-        assert len(content) > len(clean_content)
-        return clean_content
+        return _CSS_RE.sub("", content)
+
+    def _clear_snippet_markup(self, content):
+        """
+        Reduce each Pygments snippet block in `content` to its text, line
+        anchors and highlighted lines, so the comparison doesn't depend
+        on the markup of the installed Pygments version.
+        """
+        parts = []
+        pos = 0
+        start = content.find(_SNIPPETS_START)
+        while start != -1:
+            start += len(_SNIPPETS_START)
+            end = start
+            depth = 1
+            for match in _DIV_RE.finditer(content, start):
+                depth += -1 if match.group(1) else 1
+                if depth == 0:
+                    end = match.start()
+                    break
+            snippet = _ANCHOR_RE.sub(r"[\1]", content[start:end])
+            snippet = _TAG_RE.sub("", snippet.replace(_HLL_SPAN, "[hll]"))
+            lines = (line.rstrip() for line in snippet.splitlines())
+            parts.append(content[pos:start])
+            parts.append("\n".join(line for line in lines if line) + "\n")
+            pos = end
+            start = content.find(_SNIPPETS_START, pos)
+        parts.append(content[pos:])
+        return "".join(parts)
 
     def _check_html_report(
         self,
@@ -79,10 +247,10 @@ class ToolsIntegrationBase(unittest.TestCase):
         """
         Verify that the tool produces the expected HTML report.
 
-        `git_diff_path` is a path to a fixture containing the (patched) output of
+        `git_diff_path` is the name of a fixture containing the (patched) output of
         the call to `git diff`.
 
-        `expected_console_path` is a path to the fixture containing
+        `expected_html_path` is the name of the fixture containing
         the expected HTML output of the tool.
 
         `tool_args` is a list of command line arguments to pass
@@ -91,13 +259,10 @@ class ToolsIntegrationBase(unittest.TestCase):
         """
 
         # Patch the output of `git diff`
-        with open(git_diff_path, encoding="utf-8") as git_diff_file:
-            self._set_git_diff_output(git_diff_file.read(), "")
+        self._set_git_diff_output(EXPECTED[git_diff_path], "")
 
-        # Create a temporary directory to hold the output HTML report
-        # Add a cleanup to ensure the directory gets deleted
-        temp_dir = tempfile.mkdtemp()
-        self.addCleanup(lambda: shutil.rmtree(temp_dir))
+        # Write the report to the class-wide temporary directory
+        temp_dir = self._temp_dir
         html_report_path = os.path.join(temp_dir, "diff_coverage.html")
 
         args = tool_args + ["--html-report", html_report_path]
@@ -107,22 +272,19 @@ class ToolsIntegrationBase(unittest.TestCase):
             args += ["--external-css-file", css_file]
 
         # Execute the tool
-        if "diff-cover" in args[0]:
-            code = diff_cover_main(args)
-        else:
-            code = diff_quality_main(args)
-
+        code = self._run_tool(args)
         self.assertEqual(code, expected_status)
 
         # Check the HTML report
-        with open(expected_html_path, encoding="utf-8") as expected_file:
-            with open(html_report_path, encoding="utf-8") as html_report:
-                html = html_report.read()
-                expected = expected_file.read()
-                if css_file is None:
-                    html = self._clear_css(html)
-                    expected = self._clear_css(expected)
-                assert_long_str_equal(expected, html, strip=True)
+        with open(html_report_path, encoding="utf-8") as html_report:
+            html = html_report.read()
+        expected = EXPECTED[expected_html_path]
+        if css_file is None:
+            html = self._clear_css(html)
+            expected = self._clear_css(expected)
+        html = self._clear_snippet_markup(html)
+        expected = self._clear_snippet_markup(expected)
+        assert_long_str_equal(expected, html, strip=True)
 
         return temp_dir
 
@@ -132,10 +294,10 @@ class ToolsIntegrationBase(unittest.TestCase):
         """
         Verify that the tool produces the expected console report.
 
-        `git_diff_path` is a path to a fixture containing the (patched) output of
+        `git_diff_path` is the name of a fixture containing the (patched) output of
         the call to `git diff`.
 
-        `expected_console_path` is a path to the fixture containing
+        `expected_console_path` is the name of the fixture containing
         the expected console output of the tool.
 
         `tool_args` is a list of command line arguments to pass
@@ -144,67 +306,150 @@ class ToolsIntegrationBase(unittest.TestCase):
         """
 
         # Patch the output of `git diff`
-        with open(git_diff_path, encoding="utf-8") as git_diff_file:
-            self._set_git_diff_output(git_diff_file.read(), "")
+        git_diff = EXPECTED[git_diff_path]
+        self._set_git_diff_output(git_diff, "")
 
-        # Capture stdout to a string buffer
+        # Execute the tool, capturing stdout to a string buffer
         string_buffer = BytesIO()
-        self._capture_stdout(string_buffer)
-
-        # Execute the tool
-        if "diff-cover" in tool_args[0]:
-            code = diff_cover_main(tool_args)
-        else:
-            code = diff_quality_main(tool_args)
-
+        stdout = io.TextIOWrapper(string_buffer, encoding="utf-8", write_through=True)
+        with contextlib.redirect_stdout(stdout):
+            if _TOOL_CACHE_DIR and "diff-cover" in tool_args[0]:
+                code = self._run_tool_cached(tool_args, git_diff, string_buffer)
+            else:
+                code = self._run_tool(tool_args)
+        # Keep the wrapper from closing the buffer when it is collected
+        stdout.detach()
         self.assertEqual(code, expected_status)
 
         # Check the console report
-        with open(expected_console_path) as expected_file:
-            report = string_buffer.getvalue()
-            expected = expected_file.read()
-            assert_long_str_equal(expected, report, strip=True)
+        report = string_buffer.getvalue()
+        expected = EXPECTED[expected_console_path]
+        assert_long_str_equal(expected, report, strip=True)
 
-    def _capture_stdout(self, string_buffer):
+    @staticmethod
+    def _run_tool(tool_args):
         """
-        Redirect output sent to `sys.stdout` to the BytesIO buffer
-        `string_buffer`.
+        Run the tool named by the first of `tool_args` in-process
+        and return its exit code.
+
+        Everything the tool touches (mocks, cwd, report directory) is
+        scoped to this process, so tests can be spread across
+        `pytest-xdist` workers.
+        """
+        if "diff-cover" in tool_args[0]:
+            return diff_cover_main(tool_args)
+        return diff_quality_main(tool_args)
+
+    def _run_tool_cached(self, tool_args, git_diff, string_buffer):
         """
-        self._mock_sys.stdout.buffer = string_buffer
+        Like `_run_tool`, but reuse the exit code and console output
+        stored in `_TOOL_CACHE_DIR` by an earlier run with the same
+        arguments, inputs and diff-cover sources.
+        """
+        key = hashlib.sha256(_source_digest())
+        # The mocked cwd and git root decide the paths in the report
+        mocked_paths = (
+            self._mock_getcwd.return_value,
+            self._mock_git_root.return_value,
+        )
+        key.update(repr((tool_args, mocked_paths)).encode())
+        key.update(git_diff.encode("utf-8"))
+        for arg in tool_args[1:]:
+            if os.path.isfile(arg):
+                with open(arg, "rb") as input_file:
+                    key.update(input_file.read())
+        cache_path = os.path.join(_TOOL_CACHE_DIR, key.hexdigest())
+
+        if os.path.exists(cache_path):
+            with open(cache_path, "rb") as cache_file:
+                code, stdout = pickle.load(cache_file)
+            string_buffer.write(stdout)
+            return code
+
+        code = self._run_tool(tool_args)
+
+        # Write to a temporary file first so concurrent runs never
+        # see a partially written entry
+        os.makedirs(_TOOL_CACHE_DIR, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=_TOOL_CACHE_DIR, delete=False) as temp:
+            pickle.dump((code, string_buffer.getvalue()), temp)
+        os.replace(temp.name, cache_path)
+        return code
 
     def _set_git_diff_output(self, stdout, stderr, returncode=0):
         """
         Patch the call to `git diff` to output `stdout`
         and `stderr`.
-        Patch the `git rev-parse` command to output
-        a phony directory.
+        Replay the output of linter commands that already ran.
         """
 
+        # Every `git diff` call gets the same output,
+        # so build its mock process once up front
+        diff_mock = Mock(returncode=returncode)
+        diff_mock.communicate.return_value = (stdout, stderr)
+
         def patch_diff(command, **kwargs):
-            if command[0:6] == [
-                "git",
-                "-c",
-                "diff.mnemonicprefix=no",
-                "-c",
-                "diff.noprefix=no",
-                "diff",
-            ]:
-                mock = Mock()
-                mock.communicate.return_value = (stdout, stderr)
-                mock.returncode = returncode
-                return mock
-            elif command[0:2] == ["git", "rev-parse"]:
-                mock = Mock()
-                mock.communicate.return_value = (self._git_root_path, "")
-                mock.returncode = returncode
-                return mock
+            if tuple(command[:6]) == _GIT_DIFF_PREFIX:
+                return diff_mock
+            elif command[0] in _LINTERS:
+                return self._run_linter(command, **kwargs)
             else:
                 process = Popen(command, **kwargs)
                 return process
 
         self._mock_popen.side_effect = patch_diff
 
+    def _run_linter(self, command, **kwargs):
+        """
+        Run the linter `command`, unless an earlier test in this class
+        already ran it; every test lints the same fixture files, so the
+        output can be reused.
 
+        Returns a mock standing in for the finished `Popen` process.
+        """
+        key = tuple(command)
+        if key not in self._linter_output:
+            if command[0] == "pylint" and self._run_pylint_in_process:
+                stdout, stderr, returncode = self._run_pylint(command)
+            else:
+                kwargs.setdefault("cwd", self._git_root_path)
+                with Popen(command, **kwargs) as process:
+                    stdout, stderr = process.communicate()
+                returncode = process.returncode
+
+            process_mock = Mock(returncode=returncode)
+            process_mock.communicate.return_value = (stdout, stderr)
+            self._linter_output[key] = process_mock
+
+        return self._linter_output[key]
+
+    def _run_pylint(self, command):
+        """
+        Run the pylint `command` in this process rather than paying
+        for a new interpreter and pylint import on every call.
+
+        Returns the `(stdout, stderr, returncode)` of the run.
+        """
+        # Imported here so only test classes that lint with pylint pay
+        # for importing pylint (and astroid)
+        from pylint.lint import Run  # pylint: disable=import-outside-toplevel
+
+        args = [
+            arg.decode(sys.getfilesystemencoding()) if isinstance(arg, bytes) else arg
+            for arg in command[1:]
+        ]
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            try:
+                returncode = Run(args, exit=False).linter.msg_status
+            except SystemExit as exit_:
+                # e.g. `pylint --version` exits even with exit=False
+                returncode = exit_.code or 0
+
+        return stdout.getvalue(), "", returncode
+
+
+@_add_report_tests
 class DiffCoverIntegrationTest(ToolsIntegrationBase):
     """
     High-level integration test.
@@ -213,114 +458,134 @@ class DiffCoverIntegrationTest(ToolsIntegrationBase):
 
     tool_module = "diff_cover.diff_cover_tool"
 
-    def test_added_file_html(self):
-        self._check_html_report(
-            "git_diff_add.txt", "add_html_report.html", ["diff-cover", "coverage.xml"]
-        )
-
-    def test_added_file_console(self):
-        self._check_console_report(
-            "git_diff_add.txt", "add_console_report.txt", ["diff-cover", "coverage.xml"]
-        )
-
-    def test_lua_coverage(self):
-        """
-        coverage report shows that diff-cover needs to normalize
-        paths read in
-        """
-        self._check_console_report(
-            "git_diff_lua.txt",
-            "lua_console_report.txt",
-            ["diff-cover", "luacoverage.xml"],
-        )
-
-    def test_fail_under_console(self):
-        self._check_console_report(
-            "git_diff_add.txt",
-            "add_console_report.txt",
-            ["diff-cover", "coverage.xml", "--fail-under=90"],
-            expected_status=1,
-        )
-
-    def test_fail_under_pass_console(self):
-        self._check_console_report(
+    # (test name, git diff fixture, expected report fixture, tool args,
+    #  expected status)
+    HTML_CASES = [
+        (
+            "added_file_html",
             "git_diff_add.txt",
-            "add_console_report.txt",
-            ["diff-cover", "coverage.xml", "--fail-under=5"],
-            expected_status=0,
-        )
-
-    def test_deleted_file_html(self):
-        self._check_html_report(
-            "git_diff_delete.txt",
-            "delete_html_report.html",
+            "add_html_report.html",
             ["diff-cover", "coverage.xml"],
-        )
-
-    def test_deleted_file_console(self):
-        self._check_console_report(
+            0,
+        ),
+        (
+            "deleted_file_html",
             "git_diff_delete.txt",
-            "delete_console_report.txt",
+            "delete_html_report.html",
             ["diff-cover", "coverage.xml"],
-        )
-
-    def test_changed_file_html(self):
-        self._check_html_report(
+            0,
+        ),
+        (
+            "changed_file_html",
             "git_diff_changed.txt",
             "changed_html_report.html",
             ["diff-cover", "coverage.xml"],
-        )
-
-    def test_fail_under_html(self):
-        self._check_html_report(
+            0,
+        ),
+        (
+            "fail_under_html",
             "git_diff_changed.txt",
             "changed_html_report.html",
             ["diff-cover", "coverage.xml", "--fail-under=100.1"],
-            expected_status=1,
-        )
-
-    def test_fail_under_pass_html(self):
-        self._check_html_report(
+            1,
+        ),
+        (
+            "fail_under_pass_html",
             "git_diff_changed.txt",
             "changed_html_report.html",
             ["diff-cover", "coverage.xml", "--fail-under=100"],
-            expected_status=0,
-        )
-
-    def test_changed_file_console(self):
-        self._check_console_report(
-            "git_diff_changed.txt",
-            "changed_console_report.txt",
-            ["diff-cover", "coverage.xml"],
-        )
-
-    def test_moved_file_html(self):
-        self._check_html_report(
+            0,
+        ),
+        (
+            "moved_file_html",
             "git_diff_moved.txt",
             "moved_html_report.html",
             ["diff-cover", "moved_coverage.xml"],
-        )
-
-    def test_moved_file_console(self):
-        self._check_console_report(
-            "git_diff_moved.txt",
-            "moved_console_report.txt",
-            ["diff-cover", "moved_coverage.xml"],
-        )
-
-    def test_mult_inputs_html(self):
-        self._check_html_report(
+            0,
+        ),
+        (
+            "mult_inputs_html",
             "git_diff_mult.txt",
             "mult_inputs_html_report.html",
             ["diff-cover", "coverage1.xml", "coverage2.xml"],
-        )
+            0,
+        ),
+        (
+            "unicode_html",
+            "git_diff_unicode.txt",
+            "unicode_html_report.html",
+            ["diff-cover", "unicode_coverage.xml"],
+            0,
+        ),
+    ]
 
-    def test_mult_inputs_console(self):
-        self._check_console_report(
+    CONSOLE_CASES = [
+        (
+            "added_file_console",
+            "git_diff_add.txt",
+            "add_console_report.txt",
+            ["diff-cover", "coverage.xml"],
+            0,
+        ),
+        (
+            "fail_under_console",
+            "git_diff_add.txt",
+            "add_console_report.txt",
+            ["diff-cover", "coverage.xml", "--fail-under=90"],
+            1,
+        ),
+        (
+            "fail_under_pass_console",
+            "git_diff_add.txt",
+            "add_console_report.txt",
+            ["diff-cover", "coverage.xml", "--fail-under=5"],
+            0,
+        ),
+        # The lua coverage report shows that diff-cover
+        # needs to normalize the paths it reads in
+        (
+            "lua_coverage",
+            "git_diff_lua.txt",
+            "lua_console_report.txt",
+            ["diff-cover", "luacoverage.xml"],
+            0,
+        ),
+        (
+            "deleted_file_console",
+            "git_diff_delete.txt",
+            "delete_console_report.txt",
+            ["diff-cover", "coverage.xml"],
+            0,
+        ),
+        (
+            "changed_file_console",
+            "git_diff_changed.txt",
+            "changed_console_report.txt",
+            ["diff-cover", "coverage.xml"],
+            0,
+        ),
+        (
+            "moved_file_console",
+            "git_diff_moved.txt",
+            "moved_console_report.txt",
+            ["diff-cover", "moved_coverage.xml"],
+            0,
+        ),
+        (
+            "mult_inputs_console",
             "git_diff_mult.txt",
             "mult_inputs_console_report.txt",
             ["diff-cover", "coverage1.xml", "coverage2.xml"],
-        )
+            0,
+        ),
+        (
+            "unicode_console",
+            "git_diff_unicode.txt",
+            "unicode_console_report.txt",
+            ["diff-cover", "unicode_coverage.xml"],
+            0,
+        ),
+    ]
 
     def test_subdir_coverage_html(self):
         """
@@ -350,28 +615,15 @@ class DiffCoverIntegrationTest(ToolsIntegrationBase):
         )
         self._mock_getcwd.return_value = old_cwd
 
-    def test_unicode_console(self):
-        self._check_console_report(
-            "git_diff_unicode.txt",
-            "unicode_console_report.txt",
-            ["diff-cover", "unicode_coverage.xml"],
-        )
-
     def test_dot_net_diff(self):
         mock_path = "/code/samplediff/"
-        self._mock_getcwd.return_value = mock_path
-        with patch.object(GitPathTool, "_git_root", return_value=mock_path):
-            self._check_console_report(
-                "git_diff_dotnet.txt",
-                "dotnet_coverage_console_report.txt",
-                ["diff-cover", "dotnet_coverage.xml"],
-            )
-
-    def test_unicode_html(self):
-        self._check_html_report(
-            "git_diff_unicode.txt",
-            "unicode_html_report.html",
-            ["diff-cover", "unicode_coverage.xml"],
+        for mock in (self._mock_getcwd, self._mock_git_root):
+            self.addCleanup(setattr, mock, "return_value", mock.return_value)
+            mock.return_value = mock_path
+        self._check_console_report(
+            "git_diff_dotnet.txt",
+            "dotnet_coverage_console_report.txt",
+            ["diff-cover", "dotnet_coverage.xml"],
         )
 
     def test_html_with_external_css(self):
@@ -393,6 +645,7 @@ class DiffCoverIntegrationTest(ToolsIntegrationBase):
             diff_cover_main(["diff-cover", "coverage.xml"])
 
 
+@_add_report_tests
 class DiffQualityIntegrationTest(ToolsIntegrationBase):
     """
     High-level integration test.
@@ -400,70 +653,64 @@ class DiffQualityIntegrationTest(ToolsIntegrationBase):
 
     tool_module = "diff_cover.diff_quality_tool"
 
-    def test_git_diff_error_diff_quality(self):
-
-        # Patch the output of `git diff` to return an error
-        self._set_git_diff_output("", "fatal error", 1)
+    _run_pylint_in_process = True
 
-        # Expect an error
-        with self.assertRaises(CommandError):
-            diff_quality_main(["diff-quality", "--violations", "pycodestyle"])
+    @classmethod
+    def setUpClass(cls):
+        # `_run_pylint` needs pylint importable in this process
+        pytest.importorskip("pylint.lint")
+        super().setUpClass()
 
-    def test_added_file_pycodestyle_html(self):
-        self._check_html_report(
+    # (test name, git diff fixture, expected report fixture, tool args,
+    #  expected status)
+    HTML_CASES = [
+        (
+            "added_file_pycodestyle_html",
             "git_diff_violations.txt",
             "pycodestyle_violations_report.html",
             ["diff-quality", "--violations=pycodestyle"],
-        )
-
-    def test_added_file_pyflakes_html(self):
-        self._check_html_report(
+            0,
+        ),
+        (
+            "added_file_pyflakes_html",
             "git_diff_violations.txt",
             "pyflakes_violations_report.html",
             ["diff-quality", "--violations=pyflakes"],
-        )
-
-    def test_added_file_pylint_html(self):
-        self._check_html_report(
+            0,
+        ),
+        (
+            "added_file_pylint_html",
             "git_diff_violations.txt",
             "pylint_violations_report.html",
             ["diff-quality", "--violations=pylint"],
-        )
-
-    def test_fail_under_html(self):
-        self._check_html_report(
+            0,
+        ),
+        (
+            "fail_under_html",
             "git_diff_violations.txt",
             "pylint_violations_report.html",
             ["diff-quality", "--violations=pylint", "--fail-under=80"],
-            expected_status=1,
-        )
-
-    def test_fail_under_pass_html(self):
-        self._check_html_report(
+            1,
+        ),
+        (
+            "fail_under_pass_html",
             "git_diff_violations.txt",
             "pylint_violations_report.html",
             ["diff-quality", "--violations=pylint", "--fail-under=40"],
-            expected_status=0,
-        )
+            0,
+        ),
+    ]
 
-    def test_html_with_external_css(self):
-        temp_dir = self._check_html_report(
-            "git_diff_violations.txt",
-            "pycodestyle_violations_report_external_css.html",
-            ["diff-quality", "--violations=pycodestyle"],
-            css_file="external_style.css",
-        )
-        self.assertTrue(os.path.exists(os.path.join(temp_dir, "external_style.css")))
-
-    def test_added_file_pycodestyle_console(self):
-        self._check_console_report(
+    CONSOLE_CASES = [
+        (
+            "added_file_pycodestyle_console",
             "git_diff_violations.txt",
             "pycodestyle_violations_report.txt",
             ["diff-quality", "--violations=pycodestyle"],
-        )
-
-    def test_added_file_pycodestyle_console_exclude_file(self):
-        self._check_console_report(
+            0,
+        ),
+        (
+            "added_file_pycodestyle_console_exclude_file",
             "git_diff_violations.txt",
             "empty_pycodestyle_violations.txt",
             [
@@ -471,82 +718,95 @@ class DiffQualityIntegrationTest(ToolsIntegrationBase):
                 "--violations=pycodestyle",
                 '--options="--exclude=violations_test_file.py"',
             ],
-        )
-
-    def test_fail_under_console(self):
-        self._check_console_report(
-            "git_diff_violations.txt",
-            "pyflakes_violations_report.txt",
-            ["diff-quality", "--violations=pyflakes", "--fail-under=90"],
-            expected_status=1,
-        )
-
-    def test_fail_under_pass_console(self):
-        self._check_console_report(
-            "git_diff_violations.txt",
-            "pyflakes_violations_report.txt",
-            ["diff-quality", "--violations=pyflakes", "--fail-under=30"],
-            expected_status=0,
-        )
-
-    def test_added_file_pyflakes_console(self):
-        self._check_console_report(
+            0,
+        ),
+        (
+            "added_file_pyflakes_console",
             "git_diff_violations.txt",
             "pyflakes_violations_report.txt",
             ["diff-quality", "--violations=pyflakes"],
-        )
-
-    def test_added_file_pyflakes_console_two_files(self):
-        self._check_console_report(
+            0,
+        ),
+        (
+            "added_file_pyflakes_console_two_files",
             "git_diff_violations_two_files.txt",
             "pyflakes_two_files.txt",
             ["diff-quality", "--violations=pyflakes"],
-        )
-
-    def test_added_file_pylint_console(self):
-        console_report = "pylint_violations_console_report.txt"
-        self._check_console_report(
+            0,
+        ),
+        (
+            "added_file_pylint_console",
             "git_diff_violations.txt",
-            console_report,
+            "pylint_violations_console_report.txt",
             ["diff-quality", "--violations=pylint"],
-        )
-
-    def test_pre_generated_pycodestyle_report(self):
-
-        # Pass in a pre-generated pycodestyle report instead of letting
-        # the tool call pycodestyle itself.
-        self._check_console_report(
+            0,
+        ),
+        (
+            "fail_under_console",
+            "git_diff_violations.txt",
+            "pyflakes_violations_report.txt",
+            ["diff-quality", "--violations=pyflakes", "--fail-under=90"],
+            1,
+        ),
+        (
+            "fail_under_pass_console",
+            "git_diff_violations.txt",
+            "pyflakes_violations_report.txt",
+            ["diff-quality", "--violations=pyflakes", "--fail-under=30"],
+            0,
+        ),
+    ]
+
+    # Pass in a pre-generated report instead of letting
+    # the tool call the quality checker itself.
+    PRE_GENERATED_CASES = [
+        (
+            "pre_generated_pycodestyle_report",
             "git_diff_violations.txt",
             "pycodestyle_violations_report.txt",
             ["diff-quality", "--violations=pycodestyle", "pycodestyle_report.txt"],
-        )
-
-    def test_pre_generated_pyflakes_report(self):
-
-        # Pass in a pre-generated pyflakes report instead of letting
-        # the tool call pyflakes itself.
-        self._check_console_report(
+            0,
+        ),
+        (
+            "pre_generated_pyflakes_report",
             "git_diff_violations.txt",
             "pyflakes_violations_report.txt",
             ["diff-quality", "--violations=pyflakes", "pyflakes_report.txt"],
-        )
-
-    def test_pre_generated_pylint_report(self):
-
-        # Pass in a pre-generated pylint report instead of letting
-        # the tool call pylint itself.
-        self._check_console_report(
+            0,
+        ),
+        (
+            "pre_generated_pylint_report",
             "git_diff_violations.txt",
             "pylint_violations_report.txt",
             ["diff-quality", "--violations=pylint", "pylint_report.txt"],
-        )
-
-    def test_pylint_report_with_dup_code_violation(self):
-        self._check_console_report(
+            0,
+        ),
+        (
+            "pylint_report_with_dup_code_violation",
             "git_diff_code_dupe.txt",
             "pylint_dupe_violations_report.txt",
             ["diff-quality", "--violations=pylint", "pylint_dupe.txt"],
+            0,
+        ),
+    ]
+
+    def test_git_diff_error_diff_quality(self):
+
+        # Patch the output of `git diff` to return an error
+        self._set_git_diff_output("", "fatal error", 1)
+
+        # Expect an error
+        with self.assertRaises(CommandError):
+            diff_quality_main(["diff-quality", "--violations", "pycodestyle"])
+
+    def test_html_with_external_css(self):
+        temp_dir = self._check_html_report(
+            "git_diff_violations.txt",
+            "pycodestyle_violations_report_external_css.html",
+            ["diff-quality", "--violations=pycodestyle"],
+            css_file="external_style.css",
         )
+        self.assertTrue(os.path.exists(os.path.join(temp_dir, "external_style.css")))
 
     def _call_quality_expecting_error(
         self, tool_name, expected_error, report_arg="pylint_report.txt"
@@ -557,8 +817,7 @@ class DiffQualityIntegrationTest(ToolsIntegrationBase):
         Takes in a string which is a tool to call and
         an string which is the error you expect to see
         """
-        with open("git_diff_add.txt", encoding="utf-8") as git_diff_file:
-            self._set_git_diff_output(git_diff_file.read(), "")
+        self._set_git_diff_output(EXPECTED["git_diff_add.txt"], "")
         argv = ["diff-quality", f"--violations={tool_name}", report_arg]
 
         with patch("diff_cover.diff_quality_tool.LOGGER") as logger: